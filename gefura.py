@@ -10,42 +10,79 @@ undirected, as well as weighted and unweighted networks are supported.
 Overlapping groups are currently only supported for global gefura.
 
 """
-from collections import defaultdict, deque
-from itertools import combinations
+import multiprocessing
+import os
+from collections import Counter, defaultdict, deque
+from functools import partial
+from heapq import heappop, heappush
+from itertools import combinations, count
 from typing import Iterable, Literal, Optional, Union
 
 import networkx as nx
-from networkx.algorithms.centrality.betweenness import (
-    _single_source_dijkstra_path_basic,
-)
+from networkx.algorithms.shortest_paths.weighted import _weight_function
 
 __version__ = "0.2"
-__all__ = ["global_gefura", "local_gefura"]
+__all__ = ["global_and_local_gefura", "global_gefura", "local_gefura"]
 
 Node = Union[str, int]
 
 
-def _groups_per_node(groups: Iterable[set[Node]]) -> dict[Node, set[int]]:
-    """Make mapping from a node to its group(s)"""
-    d = defaultdict(set)
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+
+    def _popcount(x: int) -> int:
+        return bin(x).count("1")
+
+
+def _groups_per_node(groups: Iterable[set[Node]]) -> dict[Node, int]:
+    """Make mapping from a node to its group(s)
+
+    The groups of a node are represented as a bitmask, in which bit i is set
+    if the node belongs to the i-th group.
+
+    """
+    d = defaultdict(int)
     for i, group in enumerate(groups):
         for n in group:
-            d[n].add(i)
+            d[n] |= 1 << i
     return d
 
 
-def _single_source_shortest_path_basic(G, s, max_path_length=None):
+def _relabel(
+    G: nx.Graph, group_of: dict[Node, int], weight: Optional[str] = None
+) -> tuple[list[list[int]], Optional[list[list[float]]], list[int]]:
+    """Relabel the nodes of G to contiguous integers
+
+    Node i is the i-th node of G. Returns an adjacency list of neighbour
+    indices, a parallel list of edge weights (None if `weight` is None) and
+    the group bitmask of each node by index.
+
+    """
+    nodes = list(G)
+    index = {n: i for i, n in enumerate(nodes)}
+    adj = [[index[v] for v in G[u]] for u in nodes]
+    if weight is None:
+        weights = None
+    else:
+        weight_of = _weight_function(G, weight)
+        weights = [[weight_of(u, v, d) for v, d in G[u].items()] for u in nodes]
+    return adj, weights, [group_of[n] for n in nodes]
+
+
+def _bfs_brandes(adj, s, buffers, max_path_length=None):
     """Adapted from networkx.algorithms.centrality.betweenness
 
-    Includes optional maximum path length
+    Works on an integer adjacency list (see `_relabel`) and includes optional
+    maximum path length. Predecessors, number of shortest paths and distance
+    from s are written into the buffers P, sigma and dist, which should be
+    an empty list, 0.0 and -1 respectively for every node on entry. Returns
+    S, the nodes in order of non-decreasing distance from s. Only the entries
+    of nodes in S are modified.
 
     """
+    P, sigma, dist = buffers
     S = []
-    P = {}
-    for v in G:
-        P[v] = []
-    sigma = dict.fromkeys(G, 0.0)
-    dist = {}
     sigma[s] = 1.0
     dist[s] = 0
     Q = deque([s])
@@ -53,16 +90,224 @@ def _single_source_shortest_path_basic(G, s, max_path_length=None):
         v = Q.popleft()
         S.append(v)
         distv = dist[v]
+        if max_path_length is not None and distv >= max_path_length:
+            continue  # neighbours would be too far away
         sigmav = sigma[v]
-        for w in G[v]:
-            if w not in dist:
+        for w in adj[v]:
+            if dist[w] < 0:
                 dist[w] = distv + 1
-                if max_path_length is None or dist[w] <= max_path_length:
-                    Q.append(w)
+                Q.append(w)
             if dist[w] == distv + 1:  # this is a shortest path, count paths
                 sigma[w] += sigmav
                 P[w].append(v)  # predecessors
-    return S, P, sigma, dist
+    return S
+
+
+def _dijkstra_brandes(adj, weights, s, buffers):
+    """Adapted from networkx.algorithms.centrality.betweenness
+
+    Weighted counterpart of `_bfs_brandes`, using the same buffers.
+
+    """
+    P, sigma, dist = buffers
+    S = []
+    done = set()
+    sigma[s] = 1.0
+    dist[s] = 0
+    c = count()
+    Q = [(0, next(c), s, s)]  # use Q as heap with (distance, node id) tuples
+    while Q:
+        d, _, pred, v = heappop(Q)
+        if v in done:
+            continue  # already searched this node.
+        sigma[v] += sigma[pred]  # count paths
+        S.append(v)
+        done.add(v)
+        for w, vw_weight in zip(adj[v], weights[v]):
+            vw_dist = d + vw_weight
+            seen = dist[w]
+            if w not in done and (seen < 0 or vw_dist < seen):
+                dist[w] = vw_dist
+                heappush(Q, (vw_dist, next(c), v, w))
+                sigma[w] = 0.0
+                P[w] = [v]
+            elif vw_dist == seen:  # handle equal paths
+                sigma[w] += sigma[v]
+                P[w].append(v)
+    return S
+
+
+def _gefura_sums(adj, weights, group_of, max_path_length, sources):
+    """Sum gefura contributions of shortest paths from sources
+
+    Global and local gefura only differ in which paths are counted for a
+    node, so both are accumulated from the same shortest path computations.
+    Returns a tuple of the (unnormalized) global and local sums.
+
+    """
+    n = len(adj)
+    gamma_global = [0] * n
+    gamma_local = [0] * n
+    delta = [0] * n
+    # Buffers for the shortest path computations, reset after each source
+    P = [[] for _ in range(n)]
+    sigma = [0.0] * n
+    dist = [-1] * n
+    buffers = P, sigma, dist
+    if weights is None:
+        search = partial(
+            _bfs_brandes, adj, buffers=buffers, max_path_length=max_path_length
+        )
+    else:
+        search = partial(_dijkstra_brandes, adj, weights, buffers=buffers)
+    # In a BFS, a node with a single predecessor has as many shortest paths as
+    # that predecessor. This does not hold for Dijkstra with zero-weight edges,
+    # where sigma of a finished node can still grow.
+    single_pred_shortcut = weights is None
+    num_groups = [_popcount(groups) for groups in group_of]
+    disjoint = all(k == 1 for k in num_groups)
+
+    for s in sources:
+        S = search(s)
+
+        # Accumulation
+        s_groups, s_num_groups = group_of[s], num_groups[s]
+        for w in reversed(S):
+            # We count one path i times, if it functions as a path between i
+            # different pairs of groups
+            w_groups = group_of[w]
+            if disjoint:
+                i = s_groups != w_groups
+            else:
+                i = s_num_groups * num_groups[w] - _popcount(s_groups & w_groups)
+            deltaw = delta[w]
+            Pw = P[w]
+            if single_pred_shortcut and len(Pw) == 1:
+                delta[Pw[0]] += i + deltaw
+            else:
+                coeff = (i + deltaw) / sigma[w]
+                for v in Pw:
+                    delta[v] += sigma[v] * coeff
+            if w != s:
+                gamma_global[w] += deltaw
+                if i == 0:  # w is in the same group(s) as s
+                    gamma_local[w] += deltaw
+        for w in S:  # reset buffers for the next source
+            delta[w] = 0
+            sigma[w] = 0.0
+            dist[w] = -1
+            P[w].clear()
+    return gamma_global, gamma_local
+
+
+# Function and arguments of the task that a worker process is running
+_worker_task = {}
+
+
+def _init_worker(func, args):
+    _worker_task.update(func=func, args=args)
+
+
+def _run_worker(sources):
+    return _worker_task["func"](*_worker_task["args"], sources)
+
+
+def _sum_over_sources(func, args, sources, processes=1):
+    """Sum ``func(*args, sources)`` over sources, optionally in parallel
+
+    `func` returns a tuple of lists of sums. The sources are spread over
+    `processes` worker processes (all CPUs if None), each of which returns
+    partial sums that are added up afterwards.
+
+    """
+    if processes == 1 or len(sources) <= 1:
+        return func(*args, sources)
+
+    k = processes or os.cpu_count() or 1
+    # Use a few chunks of sources per process to even out the load. The
+    # arguments are sent to each worker only once, by the initializer.
+    step = 4 * k
+    chunks = [sources[i::step] for i in range(min(step, len(sources)))]
+    with multiprocessing.Pool(k, _init_worker, (func, args)) as pool:
+        partial_sums = pool.map(_run_worker, chunks)
+
+    return tuple([sum(values) for values in zip(*sums)] for sums in zip(*partial_sums))
+
+
+def _reverse(adj, weights=None):
+    """Reverse the direction of all edges in an adjacency list from `_relabel`"""
+    radj = [[] for _ in adj]
+    for u, neighbours in enumerate(adj):
+        for v in neighbours:
+            radj[v].append(u)
+    if weights is None:
+        return radj, None
+
+    rweights = [[] for _ in adj]
+    for u, edge_weights in enumerate(weights):
+        for v, w in zip(adj[u], edge_weights):
+            rweights[v].append(w)
+    return radj, rweights
+
+
+def _gefura(
+    G: nx.Graph,
+    groups: list[set[Node]],
+    *,
+    directions: Iterable[Literal["in", "out"]] = ("out",),
+    weight: Optional[str] = None,
+    max_path_length: Optional[int] = None,
+    processes: Optional[int] = 1,
+    local_only: bool = False,
+) -> dict[str, tuple[Optional[list[float]], list[float]]]:
+    """Unnormalized global and local gefura of each node, in node order of G
+
+    Returns a mapping from each of the given directions to a tuple of global
+    and local gefura. The algorithm follows the 'out' direction in directed
+    graphs. For 'in', we reverse the direction prior to applying it.
+
+    If `local_only` is true, source nodes that cannot contribute to local
+    gefura are skipped and None is returned instead of global gefura.
+
+    """
+    group_of = _groups_per_node(groups)
+    if len(group_of) != len(G) or any(n not in group_of for n in G):
+        msg = "Nodes in G and nodes in groups should be the same!"
+        raise ValueError(msg)
+    if len(groups) <= 1:  # There are no paths between different groups
+        return {d: ([0.0] * len(G), [0.0] * len(G)) for d in directions}
+    adj, weights, group_of = _relabel(G, group_of, weight)
+
+    sources = range(len(G))
+    if local_only:
+        # Paths from s only count for the local gefura of nodes in the same
+        # group as s, so s has to be in one group, together with other nodes
+        mask_count = Counter(group_of)
+        sources = [
+            s
+            for s, mask in enumerate(group_of)
+            if mask_count[mask] > 1 and _popcount(mask) == 1
+        ]
+
+    sums = {}
+    for direction in directions:
+        if direction == "in":
+            adj_d, weights_d = _reverse(adj, weights)
+        else:
+            adj_d, weights_d = adj, weights
+        gamma_global, gamma_local = _sum_over_sources(
+            _gefura_sums,
+            (adj_d, weights_d, group_of, max_path_length),
+            sources,
+            processes,
+        )
+        sums[direction] = (None if local_only else gamma_global), gamma_local
+    return sums
+
+
+def _rescale(G: nx.Graph, gamma: list[float], factors: list[int]):
+    """Map gefura values back to the nodes of G, dividing them by factors"""
+    return {s: g / f if f else 0 for s, g, f in zip(G, gamma, factors)}
 
 
 def global_gefura(
@@ -72,6 +317,7 @@ def global_gefura(
     weight: Optional[str] = None,
     normalized: bool = True,
     max_path_length: Optional[int] = None,
+    processes: Optional[int] = 1,
 ) -> dict[Node, float]:
     """Determine global gefura measure of each node
 
@@ -96,6 +342,11 @@ def global_gefura(
     max_path_length : int or None
         Maximum number of edges to traverse (unweighted only)
 
+    processes : int or None
+        Number of worker processes to divide the shortest path computations
+        over. If None, all available CPUs are used. Defaults to 1, i.e. no
+        parallelization.
+
     Examples
     --------
     >>> import networkx as nx
@@ -105,76 +356,15 @@ def global_gefura(
     {0: 0.0, 1: 0.5, 2: 0.8, 3: 0.6, 4: 0.0}
 
     """
-    gamma = dict.fromkeys(G, 0)
-    group_of = _groups_per_node(groups)
-    if set(group_of) != set(G):
-        msg = "Nodes in G and nodes in groups should be the same!"
-        raise ValueError(msg)
-
-    for s in G:
-        if weight is None:
-            S, P, sigma, _ = _single_source_shortest_path_basic(G, s, max_path_length)
-        else:
-            S, P, sigma, _ = _single_source_dijkstra_path_basic(G, s, weight)
-
-        # Accumulation
-        delta = dict.fromkeys(G, 0)
-        s_groups = group_of[s]
-        while S:
-            w = S.pop()
-            w_groups = group_of[w]
-            # We count one path i times, if it functions as a path between i
-            # different pairs of groups
-            i = len(s_groups) * len(w_groups) - len(s_groups & w_groups)
-            deltaw = delta[w]
-            coeff = (i + deltaw) / sigma[w]
-            for v in P[w]:
-                delta[v] += sigma[v] * coeff
-            if w != s:
-                gamma[w] += deltaw
-
-    return rescale_global(gamma, G, groups, normalized=normalized)
-
-
-def _local_gefura(
-    G: nx.Graph,
-    groups: Iterable[set[Node]],
-    *,
-    weight: Optional[str] = None,
-    normalized: bool = True,
-    max_path_length: Optional[int] = None,
-) -> dict[Node, float]:
-    gamma = dict.fromkeys(G, 0)
-    group_of = _groups_per_node(groups)
-    if set(group_of) != set(G):
-        msg = "Nodes in G and nodes in groups should be the same!"
-        raise ValueError(msg)
-
-    for s in G:
-        if weight is None:
-            S, P, sigma, _ = _single_source_shortest_path_basic(
-                G, s, max_path_length=max_path_length
-            )
-        else:
-            S, P, sigma, _ = _single_source_dijkstra_path_basic(G, s, weight)
-
-        # Accumulation
-        delta = dict.fromkeys(G, 0)
-        s_groups = group_of[s]
-        while S:
-            w = S.pop()
-            w_groups = group_of[w]
-            # We count one path i times, if it functions as a path between i
-            # different pairs of groups
-            i = len(s_groups) * len(w_groups) - len(s_groups & w_groups)
-            deltaw, sigmaw = delta[w], sigma[w]
-            coeff = (i + deltaw) / sigmaw
-            for v in P[w]:
-                delta[v] += sigma[v] * coeff
-            if w != s and i == 0:
-                gamma[w] += delta[w]
-
-    return rescale_local(gamma, G, groups, normalized=normalized)
+    groups = list(groups)
+    gamma, _ = _gefura(
+        G,
+        groups,
+        weight=weight,
+        max_path_length=max_path_length,
+        processes=processes,
+    )["out"]
+    return _rescale(G, gamma, _global_factors(G, groups, normalized=normalized))
 
 
 def local_gefura(
@@ -185,6 +375,7 @@ def local_gefura(
     normalized: bool = True,
     direction: Literal["in", "out", "all"] = "out",
     max_path_length: Optional[int] = None,
+    processes: Optional[int] = 1,
 ) -> dict[Node, float]:
     """Determine local gefura measure of each node
 
@@ -216,6 +407,11 @@ def local_gefura(
     max_path_length : int or None
         Maximum number of edges to traverse (unweighted only)
 
+    processes : int or None
+        Number of worker processes to divide the shortest path computations
+        over. If None, all available CPUs are used. Defaults to 1, i.e. no
+        parallelization.
+
     Examples
     --------
     >>> import networkx as nx
@@ -225,78 +421,139 @@ def local_gefura(
     {0: 0.0, 1: 0, 2: 0.6666666666666666, 3: 1.0, 4: 0.0}
 
     """
-    kwargs = {
-        "weight": weight,
-        "normalized": normalized,
-        "max_path_length": max_path_length,
-    }
-    if not G.is_directed() or direction == "out":
-        return _local_gefura(G, groups, **kwargs)
-
-    if direction not in ("in", "all"):
+    groups = list(groups)
+    if not G.is_directed():
+        direction = "out"
+    elif direction not in ("in", "out", "all"):
         msg = "Direction should be either 'in', 'out' or 'all'."
         raise ValueError(msg)
 
-    # The algorithm follows the 'out' direction in directed graphs.
-    # For 'in', we reverse the direction prior to applying the algorithm.
-    gamma_in = _local_gefura(G.reverse(copy=False), groups, **kwargs)
-    if direction == "in":
-        return gamma_in
-
+    directions = ("in", "out") if direction == "all" else (direction,)
+    sums = _gefura(
+        G,
+        groups,
+        directions=directions,
+        weight=weight,
+        max_path_length=max_path_length,
+        processes=processes,
+        local_only=True,
+    )
     # 'all' is the sum of 'in' and 'out'
-    gamma_out = _local_gefura(G, groups, **kwargs)
-    norm = 2 if normalized else 1  # Count both A -> gamma and gamma -> A
+    gamma = [sum(values) for values in zip(*(sums[d][1] for d in directions))]
 
-    return {k: (gamma_in[k] + gamma_out[k]) / norm for k in gamma_in}
+    if not normalized:
+        return dict(zip(G, gamma))
+    factors = _local_factors(G, groups)
+    if direction == "all":
+        factors = [2 * f for f in factors]  # Count both A -> gamma and gamma -> A
+    return _rescale(G, gamma, factors)
 
 
-def rescale_global(
-    gamma: dict[Node, float],
+def global_and_local_gefura(
     G: nx.Graph,
     groups: Iterable[set[Node]],
     *,
-    normalized: bool,
-) -> dict[Node, float]:
+    weight: Optional[str] = None,
+    normalized: bool = True,
+    max_path_length: Optional[int] = None,
+    processes: Optional[int] = 1,
+) -> tuple[dict[Node, float], dict[Node, float]]:
+    """Determine both global and local gefura measure of each node
+
+    This gives the same results as calling `global_gefura` and `local_gefura`
+    separately, but only computes the shortest paths once. In a directed
+    network, local gefura is determined for direction 'out'.
+
+    Arguments
+    ---------
+    G : a networkx.Graph
+        the network
+
+    groups : a list or iterable of sets
+        Each set represents a group and contains 1 to N nodes
+
+    weight : None or a string
+        If None, the network is treated as unweighted. If a string, this is
+        the edge data key corresponding to the edge weight
+
+    normalized : True|False
+        Whether or not to normalize the output to [0, 1].
+
+    max_path_length : int or None
+        Maximum number of edges to traverse (unweighted only)
+
+    processes : int or None
+        Number of worker processes to divide the shortest path computations
+        over. If None, all available CPUs are used. Defaults to 1, i.e. no
+        parallelization.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> G = nx.path_graph(5)
+    >>> groups = [{0, 2}, {1}, {3, 4}]
+    >>> gamma_global, gamma_local = global_and_local_gefura(G, groups)
+    >>> gamma_global
+    {0: 0.0, 1: 0.5, 2: 0.8, 3: 0.6, 4: 0.0}
+    >>> gamma_local
+    {0: 0.0, 1: 0, 2: 0.6666666666666666, 3: 1.0, 4: 0.0}
+
+    """
+    groups = list(groups)
+    gamma_global, gamma_local = _gefura(
+        G,
+        groups,
+        weight=weight,
+        max_path_length=max_path_length,
+        processes=processes,
+    )["out"]
+    gamma_global = _rescale(
+        G, gamma_global, _global_factors(G, groups, normalized=normalized)
+    )
+    if normalized:
+        gamma_local = _rescale(G, gamma_local, _local_factors(G, groups))
+    else:
+        gamma_local = dict(zip(G, gamma_local))
+    return gamma_global, gamma_local
+
+
+def _global_factors(
+    G: nx.Graph, groups: Iterable[set[Node]], *, normalized: bool
+) -> list[int]:
+    """Factor to divide the global gefura of each node in G by"""
     # Since all shortest paths are counted twice if undirected, we divide by 2.
     # Only do this in the unnormalized case. If normalized, we need to account
     # for both group A -> B and B -> A.
     base_factor = 1 if G.is_directed() and not normalized else 2
+    if not normalized:
+        return [base_factor] * len(G)
+
+    # Number of pairs of nodes between all combinations of 2 groups
+    num_pairs = sum(len(A) * len(B) - len(A & B) for A, B in combinations(groups, 2))
+
+    # For each node s, we subtract the pairs that s is part of. These only
+    # depend on the number of groups s belongs to and their total size.
+    total_size = sum(len(group) for group in groups)
+    num_groups = defaultdict(int)
+    size_groups = defaultdict(int)
+    for group in groups:
+        for n in group:
+            num_groups[n] += 1
+            size_groups[n] += len(group)
 
+    factors = []
     for s in G:
-        if normalized:
-            # All combinations of 2 groups
-            group_combinations = list(combinations(groups, 2))
-            ss = {s}
-            factor = (
-                sum(
-                    len(A - ss) * len(B - ss) - len(A & B - ss)
-                    for A, B in group_combinations
-                )
-                * base_factor
-            )
-        else:
-            factor = base_factor
-        try:
-            gamma[s] /= factor
-        except ZeroDivisionError:
-            gamma[s] = 0
-
-    return gamma
+        m = num_groups[s]
+        factor = num_pairs - m * total_size + size_groups[s] + m * (m - 1)
+        factors.append(factor * base_factor)
+    return factors
 
 
-def rescale_local(
-    gamma: dict[Node, float],
-    G: nx.Graph,
-    groups: Iterable[set[Node]],
-    *,
-    normalized: bool,
-) -> dict[Node, float]:
-    if normalized:
-        for s in G:
-            own_group_size = next(len(group) for group in groups if s in group)
-            factor = (own_group_size - 1) * (len(G) - own_group_size)
-            try:
-                gamma[s] /= factor
-            except ZeroDivisionError:
-                gamma[s] = 0
-    return gamma
+def _local_factors(G: nx.Graph, groups: Iterable[set[Node]]) -> list[int]:
+    """Factor to divide the normalized local gefura of each node in G by"""
+    own_group_size = {}
+    for group in groups:
+        for n in group:
+            own_group_size.setdefault(n, len(group))
+    n = len(G)
+    return [(own_group_size[s] - 1) * (n - own_group_size[s]) for s in G]
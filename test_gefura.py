@@ -1,13 +1,16 @@
-import itertools
+from collections import defaultdict
+from functools import partial
 
 import networkx as nx
 import pytest
 
-from gefura import global_gefura, local_gefura
+from gefura import global_and_local_gefura, global_gefura, local_gefura
 
-# Format: (list of edges, node to gefura value dict, kwargs, ID)
-# We follow the convention that nodes that start with the same character
-# belong to the same group.
+approx = partial(pytest.approx, rel=1e-9, abs=1e-12)
+
+# Format: (list of edges, groups, node to gefura value dict, kwargs, ID)
+# For string nodes, we follow the convention that nodes that start with the
+# same character belong to the same group.
 global_gefura_data = [
     pytest.param(
         [
@@ -22,6 +25,11 @@ global_gefura_data = [
             ("b2", "c2"),
             ("c2", "c3"),
         ],
+        [
+            frozenset({"a1", "a2", "a3"}),
+            frozenset({"b1", "b2"}),
+            frozenset({"c1", "c2", "c3"}),
+        ],
         {
             "a1": 0,
             "a2": 13 / 48,
@@ -44,6 +52,11 @@ global_gefura_data = [
             ("c2", "b3"),
             ("b3", "a2"),
         ],
+        [
+            frozenset({"a1", "a2"}),
+            frozenset({"b1", "b2", "b3"}),
+            frozenset({"c1", "c2"}),
+        ],
         {
             "a1": 0,
             "a2": 0,
@@ -58,57 +71,95 @@ global_gefura_data = [
     ),
     pytest.param(
         [("b1", "a1"), ("a1", "a2"), ("a1", "b2"), ("a2", "a3"), ("a3", "b2")],
+        [frozenset({"a1", "a2", "a3"}), frozenset({"b1", "b2"})],
         {"a1": 2.5, "a2": 0.5, "a3": 0.5, "b1": 0, "b2": 0.5},
         {"normalized": False},
         id="2 groups, unnormalized",
     ),
     pytest.param(
         [("a1", "a2"), ("a2", "b1"), ("b1", "b2"), ("b2", "b3")],
+        [frozenset({"a1", "a2"}), frozenset({"b1", "b2", "b3"})],
         {"a1": 0, "a2": 1, "b1": 1, "b2": 0.5, "b3": 0},
         {},
         id="line graph, 2 groups",
     ),
+    pytest.param(
+        [(1, 2), (2, 3)],
+        [frozenset({1, 2}), frozenset({2, 3})],
+        {1: 0, 2: 1, 3: 0},
+        {},
+        id="overlapping groups",
+    ),
 ]
 
 
 def group_nodes_by_first_char(G):
-    return [set(grp[1]) for grp in itertools.groupby(sorted(G), key=lambda x: x[0])]
+    groups = defaultdict(set)
+    for n in G:
+        groups[n[0]].add(n)
+    return [frozenset(group) for group in groups.values()]
 
 
-@pytest.mark.parametrize(("edges", "expected", "kwargs"), global_gefura_data)
-def test_global_gefura(edges, expected, kwargs):
-    G = nx.Graph()
-    G.add_edges_from(edges)
-    groups = group_nodes_by_first_char(G)
+@pytest.mark.parametrize(("edges", "groups", "expected", "kwargs"), global_gefura_data)
+def test_global_gefura(edges, groups, expected, kwargs):
+    G = nx.Graph(edges)
+
+    assert global_gefura(G, groups, **kwargs) == approx(expected)
+
+
+local_gefura_data = [
+    pytest.param(
+        [
+            ("a3", "a2"),
+            ("a2", "c1"),
+            ("c1", "b1"),
+            ("b1", "a1"),
+            ("a1", "b2"),
+            ("b2", "b3"),
+        ],
+        [
+            frozenset({"a1", "a2", "a3"}),
+            frozenset({"b1", "b2", "b3"}),
+            frozenset({"c1"}),
+        ],
+        {"a1": 4, "a2": 4, "a3": 0, "b1": 6, "b2": 4, "b3": 0, "c1": 0},
+        {"normalized": False},
+        id="line graph, 3 groups, unnormalized",
+    ),
+]
+
+
+@pytest.mark.parametrize(("edges", "groups", "expected", "kwargs"), local_gefura_data)
+def test_local_gefura(edges, groups, expected, kwargs):
+    G = nx.Graph(edges)
 
-    assert global_gefura(G, groups, **kwargs) == pytest.approx(expected)
+    assert local_gefura(G, groups, **kwargs) == approx(expected)
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def graph_with_singleton_groups():
-    G = nx.Graph()
-    G.add_edge(1, 2)
+    G = nx.Graph([(1, 2)])
 
-    return G, [{1}, {2}], {1: 0.0, 2: 0.0}
+    return nx.freeze(G), [frozenset({1}), frozenset({2})], {1: 0.0, 2: 0.0}
 
 
 def test_singleton_groups_global(graph_with_singleton_groups):
     G, groups, expected = graph_with_singleton_groups
 
-    assert global_gefura(G, groups, normalized=False) == pytest.approx(expected)
+    assert global_gefura(G, groups, normalized=False) == approx(expected)
     # Normalization should not throw ZeroDivisionError
-    assert global_gefura(G, groups) == pytest.approx(expected)
+    assert global_gefura(G, groups) == approx(expected)
 
 
 def test_singleton_groups_local(graph_with_singleton_groups):
     G, groups, expected = graph_with_singleton_groups
 
-    assert local_gefura(G, groups, normalized=False) == pytest.approx(expected)
+    assert local_gefura(G, groups, normalized=False) == approx(expected)
     # Normalization should not throw ZeroDivisionError
-    assert local_gefura(G, groups) == pytest.approx(expected)
+    assert local_gefura(G, groups) == approx(expected)
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def digraph():
     edges = [
         ("a1", "a2"),
@@ -118,48 +169,40 @@ def digraph():
         ("b1", "a1"),
         ("b1", "b2"),
     ]
-    G = nx.DiGraph()
-    G.add_edges_from(edges)
-    return G
+    G = nx.freeze(nx.DiGraph(edges))
+    return G, group_nodes_by_first_char(G)
 
 
 def test_digraph_global(digraph):
-    groups = group_nodes_by_first_char(digraph)
+    G, groups = digraph
 
     known_vals_unnormalized = {"a1": 1.5, "a2": 1, "b1": 0.5, "b2": 0}
     known_vals_normalized = {"a1": 0.375, "a2": 0.25, "b1": 0.125, "b2": 0}
 
-    gamma = global_gefura(digraph, groups, normalized=False)
-    assert gamma == pytest.approx(known_vals_unnormalized)
-    assert global_gefura(digraph, groups) == pytest.approx(known_vals_normalized)
-
-
-def test_digraph_local(digraph):
-    groups = group_nodes_by_first_char(digraph)
+    gamma = global_gefura(G, groups, normalized=False)
+    assert gamma == approx(known_vals_unnormalized)
+    assert global_gefura(G, groups) == approx(known_vals_normalized)
 
-    known_vals_unnormalized_out = {"a1": 0.5, "a2": 1, "b1": 0, "b2": 0}
-    known_vals_unnormalized_in = {"a1": 1, "a2": 0, "b1": 0.5, "b2": 0}
-    known_vals_unnormalized_all = {"a1": 1.5, "a2": 1, "b1": 0.5, "b2": 0}
-    known_vals_normalized_out = {"a1": 0.25, "a2": 0.5, "b1": 0, "b2": 0}
-    known_vals_normalized_in = {"a1": 0.5, "a2": 0, "b1": 0.25, "b2": 0}
-    known_vals_normalized_all = {"a1": 0.375, "a2": 0.25, "b1": 0.125, "b2": 0}
 
-    gamma_out = local_gefura(digraph, groups, normalized=False)
-    assert gamma_out == pytest.approx(known_vals_unnormalized_out)
-    gamma_in = local_gefura(digraph, groups, normalized=False, direction="in")
-    assert gamma_in == pytest.approx(known_vals_unnormalized_in)
-    gamma_all = local_gefura(digraph, groups, normalized=False, direction="all")
-    assert gamma_all == pytest.approx(known_vals_unnormalized_all)
+@pytest.mark.parametrize(
+    ("direction", "normalized", "expected"),
+    [
+        ("out", False, {"a1": 0.5, "a2": 1, "b1": 0, "b2": 0}),
+        ("in", False, {"a1": 1, "a2": 0, "b1": 0.5, "b2": 0}),
+        ("all", False, {"a1": 1.5, "a2": 1, "b1": 0.5, "b2": 0}),
+        ("out", True, {"a1": 0.25, "a2": 0.5, "b1": 0, "b2": 0}),
+        ("in", True, {"a1": 0.5, "a2": 0, "b1": 0.25, "b2": 0}),
+        ("all", True, {"a1": 0.375, "a2": 0.25, "b1": 0.125, "b2": 0}),
+    ],
+)
+def test_digraph_local(digraph, direction, normalized, expected):
+    G, groups = digraph
 
-    gamma_out = local_gefura(digraph, groups)
-    assert gamma_out == pytest.approx(known_vals_normalized_out)
-    gamma_in = local_gefura(digraph, groups, direction="in")
-    assert gamma_in == pytest.approx(known_vals_normalized_in)
-    gamma_all = local_gefura(digraph, groups, direction="all")
-    assert gamma_all == pytest.approx(known_vals_normalized_all)
+    gamma = local_gefura(G, groups, normalized=normalized, direction=direction)
+    assert gamma == approx(expected)
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def weighted_graph():
     edges = [
         ("a1", "a2", 1),
@@ -170,34 +213,55 @@ def weighted_graph():
     ]
     G = nx.Graph()
     G.add_weighted_edges_from(edges)
-    return G
+    G = nx.freeze(G)
+    return G, group_nodes_by_first_char(G)
 
 
 def test_weighted_graph_global(weighted_graph):
-    groups = group_nodes_by_first_char(weighted_graph)
+    G, groups = weighted_graph
 
     known_vals = {"a1": 0.5, "a2": 1 / 6, "b1": 0.5, "b2": 0.125, "b3": 0.125}
-    gamma = global_gefura(weighted_graph, groups, weight="weight")
-    assert gamma == pytest.approx(known_vals)
+    gamma = global_gefura(G, groups, weight="weight")
+    assert gamma == approx(known_vals)
 
 
 def test_global_ignore_weights(weighted_graph):
-    groups = group_nodes_by_first_char(weighted_graph)
+    G, groups = weighted_graph
 
     known_vals = {"a1": 1 / 3, "a2": 1 / 3, "b1": 0.25, "b2": 0.25, "b3": 0}
-    gamma = global_gefura(weighted_graph, groups)
-    assert gamma == pytest.approx(known_vals)
+    gamma = global_gefura(G, groups)
+    assert gamma == approx(known_vals)
 
 
 def test_weighted_graph_local(weighted_graph):
-    groups = group_nodes_by_first_char(weighted_graph)
+    G, groups = weighted_graph
 
     known_vals = {"a1": 1.5, "a2": 0.5, "b1": 2, "b2": 0.5, "b3": 0.5}
-    gamma = local_gefura(weighted_graph, groups, weight="weight", normalized=False)
-    assert gamma == pytest.approx(known_vals)
+    gamma = local_gefura(G, groups, weight="weight", normalized=False)
+    assert gamma == approx(known_vals)
+
+
+@pytest.mark.parametrize(
+    "edges",
+    [
+        [(0, 1, 0), (0, 2, 0), (1, 2, 1)],
+        [(0, 1, 0), (1, 2, 0), (2, 3, 1), (0, 3, 1), (1, 3, 2), (3, 4, 0)],
+    ],
+)
+def test_zero_weight_edges(edges):
+    # With every node in its own group, unnormalized global gefura equals
+    # betweenness centrality
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges)
+    groups = [{n} for n in G]
 
+    gamma = global_gefura(G, groups, weight="weight", normalized=False)
+    assert gamma == approx(
+        nx.betweenness_centrality(G, weight="weight", normalized=False)
+    )
 
-@pytest.fixture()
+
+@pytest.fixture(scope="session")
 def small_graph_3_groups():
     edges = [
         ("a1", "b1"),
@@ -207,13 +271,12 @@ def small_graph_3_groups():
         ("b2", "c2"),
         ("a1", "c1"),
     ]
-    G = nx.Graph()
-    G.add_edges_from(edges)
-    return G
+    G = nx.freeze(nx.Graph(edges))
+    return G, group_nodes_by_first_char(G)
 
 
 def test_local_normalized(small_graph_3_groups):
-    groups = group_nodes_by_first_char(small_graph_3_groups)
+    G, groups = small_graph_3_groups
 
     known_gamma = {
         "a1": 0.125,
@@ -223,53 +286,36 @@ def test_local_normalized(small_graph_3_groups):
         "c1": 0.125,
         "c2": 0,
     }
-    gamma = local_gefura(small_graph_3_groups, groups)
-    assert gamma == pytest.approx(known_gamma)
+    gamma = local_gefura(G, groups)
+    assert gamma == approx(known_gamma)
 
 
 def test_local_unnormalized(small_graph_3_groups):
-    groups = group_nodes_by_first_char(small_graph_3_groups)
+    G, groups = small_graph_3_groups
 
     known_gamma = {"a1": 0.5, "a2": 0, "b1": 1.5, "b2": 1.5, "c1": 0.5, "c2": 0}
-    gamma = local_gefura(small_graph_3_groups, groups, normalized=False)
-    assert gamma == pytest.approx(known_gamma)
+    gamma = local_gefura(G, groups, normalized=False)
+    assert gamma == approx(known_gamma)
 
 
 def test_global_max_path_length(small_graph_3_groups):
-    groups = group_nodes_by_first_char(small_graph_3_groups)
+    G, groups = small_graph_3_groups
 
     # max_path_length of 2
     known_gamma = {"a1": 0.5, "a2": 0, "b1": 1.5, "b2": 1.5, "c1": 0.5, "c2": 0}
-    assert global_gefura(
-        small_graph_3_groups, groups, normalized=False, max_path_length=2
-    ) == pytest.approx(known_gamma)
+    assert global_gefura(G, groups, normalized=False, max_path_length=2) == approx(
+        known_gamma
+    )
 
 
 def test_local_max_path_length(small_graph_3_groups):
-    groups = group_nodes_by_first_char(small_graph_3_groups)
+    G, groups = small_graph_3_groups
 
     # max_path_length of 2
     known_gamma = {"a1": 0.5, "a2": 0, "b1": 1.5, "b2": 1.5, "c1": 0.5, "c2": 0}
-    assert global_gefura(
-        small_graph_3_groups, groups, normalized=False, max_path_length=2
-    ) == pytest.approx(known_gamma)
-
-
-def test_local_line_graph():
-    edges = [
-        ("a3", "a2"),
-        ("a2", "c1"),
-        ("c1", "b1"),
-        ("b1", "a1"),
-        ("a1", "b2"),
-        ("b2", "b3"),
-    ]
-    groups = [{"a1", "a2", "a3"}, {"b1", "b2", "b3"}, {"c1"}]
-    known_vals = {"a1": 4, "a2": 4, "a3": 0, "b1": 6, "b2": 4, "b3": 0, "c1": 0}
-    G = nx.Graph()
-    G.add_edges_from(edges)
-
-    assert local_gefura(G, groups, normalized=False) == pytest.approx(known_vals)
+    assert global_gefura(G, groups, normalized=False, max_path_length=2) == approx(
+        known_gamma
+    )
 
 
 wrong_node_set_msg = "Nodes in G and nodes in groups.*"
@@ -285,12 +331,15 @@ def test_wrong_node_set_local():
         local_gefura(nx.Graph(), [{1}])
 
 
-def test_local_directed_wrong_direction_value():
+def test_local_directed_wrong_direction_value(digraph):
+    G, groups = digraph
+
     with pytest.raises(ValueError, match="Direction should be.*"):
-        local_gefura(nx.DiGraph(), [], direction="foobar")
+        local_gefura(G, groups, direction="foobar")
 
 
-def test_local_directed():
+@pytest.fixture(scope="session")
+def directed_graph_3_groups():
     edges = [
         ("a1", "a2"),
         ("a1", "b1"),
@@ -301,57 +350,61 @@ def test_local_directed():
         ("c1", "a1"),
         ("c2", "c1"),
     ]
-    groups = [{"a1", "a2", "a3"}, {"b1", "b2"}, {"c1", "c2"}]
-    known_out = {"a1": 0.375, "a2": 0, "a3": 0, "b1": 0, "b2": 0, "c1": 1, "c2": 0}
-    known_in = {"a1": 0.75, "a2": 0.375, "a3": 0, "b1": 0.8, "b2": 0, "c1": 0, "c2": 0}
-    known_all = {
-        "a1": 9 / 16,
-        "a2": 3 / 16,
-        "a3": 0,
-        "b1": 0.4,
-        "b2": 0,
-        "c1": 0.5,
-        "c2": 0,
-    }
-    G = nx.DiGraph()
-    G.add_edges_from(edges)
-
-    for d, vals in (("out", known_out), ("in", known_in), ("all", known_all)):
-        assert local_gefura(G, groups, direction=d) == pytest.approx(vals)
-
-
-def test_overlap_simple():
-    G = nx.Graph()
-    G.add_edges_from([(1, 2), (2, 3)])
-    groups = [{1, 2}, {2, 3}]
-    known = {1: 0, 2: 1, 3: 0}
-    assert global_gefura(G, groups) == pytest.approx(known)
-
-
-@pytest.fixture()
+    G = nx.freeze(nx.DiGraph(edges))
+    return G, group_nodes_by_first_char(G)
+
+
+@pytest.mark.parametrize(
+    ("direction", "expected"),
+    [
+        ("out", {"a1": 0.375, "a2": 0, "a3": 0, "b1": 0, "b2": 0, "c1": 1, "c2": 0}),
+        (
+            "in",
+            {"a1": 0.75, "a2": 0.375, "a3": 0, "b1": 0.8, "b2": 0, "c1": 0, "c2": 0},
+        ),
+        (
+            "all",
+            {
+                "a1": 9 / 16,
+                "a2": 3 / 16,
+                "a3": 0,
+                "b1": 0.4,
+                "b2": 0,
+                "c1": 0.5,
+                "c2": 0,
+            },
+        ),
+    ],
+)
+def test_local_directed(directed_graph_3_groups, direction, expected):
+    G, groups = directed_graph_3_groups
+
+    assert local_gefura(G, groups, direction=direction) == approx(expected)
+
+
+@pytest.fixture(scope="session")
 def overlapping_line_graph():
     edges = [(1, 2), (2, 3), (3, 4)]
-    groups = [{1, 2, 3}, {2, 3, 4}, {4}]
-    G = nx.Graph()
-    G.add_edges_from(edges)
-    return G, groups
+    groups = [frozenset({1, 2, 3}), frozenset({2, 3, 4}), frozenset({4})]
+    G = nx.Graph(edges)
+    return nx.freeze(G), groups
 
 
 def test_overlapping_line_graph_unnormalized(overlapping_line_graph):
     G, groups = overlapping_line_graph
 
     known = {1: 0, 2: 3, 3: 5, 4: 0}
-    assert global_gefura(G, groups, normalized=False) == pytest.approx(known)
+    assert global_gefura(G, groups, normalized=False) == approx(known)
 
 
 def test_overlapping_line_graph_normalized(overlapping_line_graph):
     G, groups = overlapping_line_graph
 
     known = {1: 0, 2: 0.5, 3: 5 / 6, 4: 0}
-    assert global_gefura(G, groups) == pytest.approx(known)
+    assert global_gefura(G, groups) == approx(known)
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def overlapping_graph():
     edges = [
         (1, 2),
@@ -365,10 +418,9 @@ def overlapping_graph():
         (6, 8),
         (7, 8),
     ]
-    groups = [{1, 2, 3}, {2, 3, 4, 5, 6}, {4, 7, 8}]
-    G = nx.Graph()
-    G.add_edges_from(edges)
-    return G, groups
+    groups = [frozenset({1, 2, 3}), frozenset({2, 3, 4, 5, 6}), frozenset({4, 7, 8})]
+    G = nx.Graph(edges)
+    return nx.freeze(G), groups
 
 
 def test_overlapping_graph_unnormalized(overlapping_graph):
@@ -383,7 +435,7 @@ def test_overlapping_graph_unnormalized(overlapping_graph):
         7: 5 / 3,
         8: 7 / 6,
     }
-    assert global_gefura(G, groups, normalized=False) == pytest.approx(known)
+    assert global_gefura(G, groups, normalized=False) == approx(known)
 
 
 def test_overlapping_graph_normalized(overlapping_graph):
@@ -398,7 +450,7 @@ def test_overlapping_graph_normalized(overlapping_graph):
         7: 5 / 84,
         8: 7 / 168,
     }
-    assert global_gefura(G, groups) == pytest.approx(known)
+    assert global_gefura(G, groups) == approx(known)
 
 
 @pytest.mark.parametrize(("n", "m"), list(zip(range(10, 50), range(20, 100, 2))))
@@ -418,3 +470,94 @@ def test_max_path_length_long_path(n, m):
     assert local_gefura(graph, groups, max_path_length=n + 1) == local_gefura(
         graph, groups
     )
+
+
+@pytest.mark.parametrize("gefura_func", [global_gefura, local_gefura])
+def test_processes(gefura_func):
+    graph = nx.gnm_random_graph(30, 60, seed=42)
+    groups = [set(range(10)), set(range(10, 20)), set(range(20, 30))]
+
+    assert gefura_func(graph, groups, processes=2) == approx(gefura_func(graph, groups))
+
+
+@pytest.mark.parametrize("gefura_func", [global_gefura, local_gefura])
+def test_single_group(gefura_func):
+    G = nx.path_graph(4)
+    groups = [set(G)]
+
+    assert gefura_func(G, groups) == approx(dict.fromkeys(G, 0))
+    assert gefura_func(G, iter(groups)) == approx(dict.fromkeys(G, 0))
+
+
+@pytest.mark.parametrize("gefura_func", [global_gefura, local_gefura])
+def test_integer_labels(small_graph_3_groups, gefura_func):
+    G, groups = small_graph_3_groups
+    H = nx.convert_node_labels_to_integers(G, label_attribute="label")
+    mapping = {label: n for n, label in H.nodes(data="label")}
+    int_groups = [{mapping[n] for n in group} for group in groups]
+
+    gamma = gefura_func(H, int_groups)
+    assert {H.nodes[n]["label"]: v for n, v in gamma.items()} == approx(
+        gefura_func(G, groups)
+    )
+
+
+@pytest.mark.parametrize("normalized", [True, False])
+def test_global_and_local_gefura(digraph, normalized):
+    G, groups = digraph
+
+    gamma_global, gamma_local = global_and_local_gefura(
+        G, groups, normalized=normalized
+    )
+    assert gamma_global == approx(global_gefura(G, groups, normalized=normalized))
+    assert gamma_local == approx(local_gefura(G, groups, normalized=normalized))
+
+
+@pytest.fixture(scope="session")
+def random_graph():
+    G = nx.freeze(nx.erdos_renyi_graph(40, 0.15, seed=0))
+    groups = [frozenset(range(10)), frozenset(range(10, 25)), frozenset(range(25, 40))]
+    return G, groups
+
+
+@pytest.mark.parametrize("gefura_func", [global_gefura, local_gefura])
+def test_normalized_between_0_and_1(random_graph, gefura_func):
+    G, groups = random_graph
+
+    assert all(0 <= v <= 1 for v in gefura_func(G, groups).values())
+
+
+def test_global_at_least_local(random_graph):
+    G, groups = random_graph
+
+    gamma_global = global_gefura(G, groups, normalized=False)
+    gamma_local = local_gefura(G, groups, normalized=False)
+    assert all(gamma_global[n] >= gamma_local[n] - 1e-9 for n in G)
+
+
+def test_two_groups_global_equals_local(random_graph):
+    # With two groups, every path between groups starts or ends in the
+    # group of the node on it, so global and local gefura coincide
+    G, _ = random_graph
+    groups = [set(range(15)), set(range(15, 40))]
+
+    assert global_gefura(G, groups, normalized=False) == approx(
+        local_gefura(G, groups, normalized=False)
+    )
+
+
+@pytest.fixture(scope="session")
+def random_digraph():
+    G = nx.freeze(nx.gnp_random_graph(40, 0.1, seed=0, directed=True))
+    groups = [frozenset(range(10)), frozenset(range(10, 25)), frozenset(range(25, 40))]
+    return G, groups
+
+
+def test_local_all_is_in_plus_out(random_digraph):
+    G, groups = random_digraph
+
+    gamma_in = local_gefura(G, groups, normalized=False, direction="in")
+    gamma_out = local_gefura(G, groups, normalized=False, direction="out")
+    assert local_gefura(G, groups, normalized=False, direction="all") == (
+        approx({n: gamma_in[n] + gamma_out[n] for n in G})
+    )